@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the whisper-daemon pipeline.
+
+Runs without a GPU or faster-whisper: the model is replaced by a
+deterministic fake, audio comes from a synthetic WAV corpus, and the stats
+database and dictionary live in a temporary directory. Results are written
+as JSON so runs can be compared.
+
+Usage:
+    python3 benchmarks/bench_daemon.py                     # full suite
+    python3 benchmarks/bench_daemon.py --quick             # fewer iterations
+    python3 benchmarks/bench_daemon.py --only dictionary   # name filter
+    python3 benchmarks/bench_daemon.py --compare benchmarks/results/old.json
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_postprocess import ROOT, load_daemon  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+SAMPLE_RATE = 16000
+CORPUS_SECONDS = [1, 5, 15, 60]
+DICTIONARY_SIZES = [10, 100, 1000, 10000]
+
+# Fake transcripts mix plain words with spoken commands and fillers so
+# post-processing does representative work
+TRANSCRIPT_WORDS = (
+    "the quick brown fox jumps over the lazy dog we need to review the quarterly "
+    "numbers before the meeting on thursday and send the notes to the team"
+).split()
+TRANSCRIPT_EXTRAS = ["comma", "period", "question mark", "um", "uh", "you know",
+                     "basically", "new line", "open paren", "close paren"]
+WORDS_PER_SECOND = 2.5
+
+
+class FakeSegment:
+    def __init__(self, text: str, start: float, end: float):
+        self.text = text
+        self.start = start
+        self.end = end
+
+
+class FakeInfo:
+    def __init__(self, duration: float):
+        self.language = "en"
+        self.language_probability = 1.0
+        self.duration = duration
+        self.duration_after_vad = duration
+
+
+class FakeWhisperModel:
+    """Deterministic stand-in for faster_whisper.WhisperModel.
+
+    The transcript depends only on the audio length. decode_ms_per_second
+    optionally simulates model cost so end-to-end numbers include a decode.
+    """
+
+    hf_tokenizer = None
+
+    def __init__(self, decode_ms_per_second: float = 0.0):
+        self.decode_ms_per_second = decode_ms_per_second
+
+    def transcribe(self, audio, **kwargs):
+        if isinstance(audio, str):
+            with wave.open(audio, "rb") as wf:
+                duration = wf.getnframes() / wf.getframerate()
+        else:
+            duration = len(audio) / SAMPLE_RATE
+        text = fake_transcript(duration)
+        delay = self.decode_ms_per_second * duration / 1000
+
+        def segments():
+            if delay:
+                time.sleep(delay)
+            # ~30 s per segment, like Whisper windows
+            words = text.split()
+            step = max(1, int(30 * WORDS_PER_SECOND))
+            for i in range(0, len(words), step):
+                start = i / WORDS_PER_SECOND
+                end = min(duration, (i + step) / WORDS_PER_SECOND)
+                yield FakeSegment(" " + " ".join(words[i:i + step]), start, end)
+
+        return segments(), FakeInfo(duration)
+
+
+def fake_transcript(seconds: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = []
+    for i in range(max(1, int(seconds * WORDS_PER_SECOND))):
+        words.append(rng.choice(TRANSCRIPT_EXTRAS) if i % 6 == 5 else rng.choice(TRANSCRIPT_WORDS))
+    return " ".join(words)
+
+
+def synth_speech(seconds: float, seed: int = 0) -> bytes:
+    """s16le mono: voiced bursts (harmonics + noise) separated by pauses."""
+    rng = random.Random(seed)
+    frames = []
+    n = int(seconds * SAMPLE_RATE)
+    phase = 0.0
+    syllable = 0
+    for i in range(n):
+        if i % 3200 == 0:       # new 200 ms syllable or pause
+            syllable = rng.random()
+            pitch = 110 + 60 * rng.random()
+        voiced = syllable > 0.3
+        phase += 2 * math.pi * pitch / SAMPLE_RATE
+        value = rng.gauss(0, 0.003)                 # room noise
+        if voiced:
+            value += 0.25 * math.sin(phase) + 0.1 * math.sin(2 * phase) + 0.05 * math.sin(3 * phase)
+        frames.append(max(-32768, min(32767, int(value * 32767))))
+    return struct.pack(f"<{len(frames)}h", *frames)
+
+
+def write_corpus(directory: Path) -> dict:
+    """Write one WAV per corpus duration. Returns {seconds: path}."""
+    corpus = {}
+    for seconds in CORPUS_SECONDS:
+        path = directory / f"speech-{seconds}s.wav"
+        with wave.open(str(path), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(synth_speech(seconds, seed=seconds))
+        corpus[seconds] = path
+    return corpus
+
+
+def write_dictionary(path: Path, size: int):
+    rng = random.Random(size)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    entries = []
+    for i in range(size):
+        spoken = "".join(rng.choice(letters) for _ in range(rng.randint(4, 10)))
+        if i % 4 == 0:
+            spoken += " " + "".join(rng.choice(letters) for _ in range(5))
+        entries.append({"spoken": spoken, "replacement": f"Term{i}"})
+    # Make sure some entries occur in the fake transcripts
+    entries += [{"spoken": "quarterly", "replacement": "Quarterly"},
+                {"spoken": "thursday", "replacement": "Thursday"}]
+    path.write_text(json.dumps(entries))
+
+
+def measure(func, iterations: int, setup=None) -> dict:
+    """Run func iterations times (after one warmup) and summarize in ms."""
+    if setup:
+        setup()
+    func()
+    times = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(times), 4),
+        "p50_ms": round(times[len(times) // 2], 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        "min_ms": round(times[0], 4),
+    }
+
+
+def request_roundtrip(daemon, model, header: dict, pcm: bytes = None) -> bytes:
+    """Send one request through handle_request over a socketpair."""
+    server, client = socket.socketpair()
+    try:
+        daemon.handle_request(model, daemon.Reply(server), header, pcm=pcm)
+        server.close()
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        client.close()
+
+
+def run_suite(args) -> dict:
+    daemon = load_daemon()
+    work = Path(tempfile.mkdtemp(prefix="whisper-bench-"))
+
+    # Keep the user's stats, dictionary and noise flag out of the benchmark
+    daemon.STATS_DB = str(work / "stats.db")
+    daemon.DICTIONARY_PATH = str(work / "dictionary.json")
+    daemon.NOISE_REDUCTION_FILE = str(work / "noise-reduction.enabled")
+    daemon.init_stats_db()
+    daemon._stats_writer = daemon.StatsWriter(daemon.STATS_DB)
+    daemon._stats_writer.start()
+
+    corpus = write_corpus(work)
+    iterations = 20 if args.quick else 200
+    heavy = 3 if args.quick else 20
+    results = {}
+
+    def bench(name, func, count, setup=None, requires=()):
+        if args.only and args.only not in name:
+            return
+        missing = [module for module in requires if importlib.util.find_spec(module) is None]
+        if missing:
+            results[name] = {"skipped": f"{', '.join(missing)} not installed"}
+            print(f"  {name:<42} skipped: {results[name]['skipped']}", flush=True)
+            return
+        try:
+            results[name] = measure(func, count, setup)
+            print(f"  {name:<42} p50 {results[name]['p50_ms']:>10.3f} ms", flush=True)
+        except Exception as e:
+            results[name] = {"skipped": str(e)}
+            print(f"  {name:<42} skipped: {e}", flush=True)
+
+    print("Text post-processing", flush=True)
+    for seconds in CORPUS_SECONDS:
+        text = fake_transcript(seconds)
+        bench(f"process_punctuation[{seconds}s]", lambda t=text: daemon.process_punctuation(t), iterations)
+        punctuated = daemon.process_punctuation(text)
+        bench(f"remove_fillers[{seconds}s]", lambda t=punctuated: daemon.remove_fillers(t), iterations)
+        bench(f"clean_transcript[{seconds}s]", lambda t=text: daemon.clean_transcript(t), iterations)
+
+    print("Dictionary", flush=True)
+    dict_text = daemon.clean_transcript(fake_transcript(60))
+    for size in DICTIONARY_SIZES:
+        write_dictionary(Path(daemon.DICTIONARY_PATH), size)
+
+        def rebuild():
+            daemon._dictionary_cache["mtime"] = 0
+        bench(f"dictionary_build[{size}]", daemon.load_dictionary, heavy, setup=rebuild)
+        daemon.load_dictionary()
+        bench(f"apply_dictionary[{size}]", lambda: daemon.apply_dictionary(dict_text), iterations)
+        bench(f"get_dictionary_prompt[{size}]", lambda: daemon.get_dictionary_prompt(), iterations)
+    os.remove(daemon.DICTIONARY_PATH)
+
+    print("Audio", flush=True)
+    for seconds, path in corpus.items():
+        bench(f"get_audio_duration_ms[{seconds}s]", lambda p=str(path): daemon.get_audio_duration_ms(p), iterations)
+        bench(f"load_wav_pcm[{seconds}s]", lambda p=str(path): daemon.load_wav_pcm(p), iterations)
+
+    Path(daemon.NOISE_REDUCTION_FILE).touch()
+    for seconds in (5, 15):
+        path = str(corpus[seconds])
+
+        def cleanup(p=path):
+            if os.path.exists(p + ".clean.wav"):
+                os.remove(p + ".clean.wav")
+        bench(f"preprocess_audio[{seconds}s]", lambda p=path: daemon.preprocess_audio(p), heavy,
+              setup=cleanup, requires=("noisereduce", "soundfile"))
+        cleanup()
+        samples = daemon.pcm_to_float32(daemon.load_wav_pcm(path))
+        bench(f"preprocess_samples[{seconds}s]", lambda s=samples: daemon.preprocess_samples(s), heavy,
+              requires=("noisereduce",))
+    os.remove(daemon.NOISE_REDUCTION_FILE)
+
+    print("End to end (fake model)", flush=True)
+    model = FakeWhisperModel(args.decode_ms_per_second)
+
+    def fresh_cache():
+        daemon._transcript_cache = daemon.TranscriptCache(daemon.TRANSCRIPT_CACHE_SIZE)
+    for seconds, path in corpus.items():
+        header = {"path": str(path), "mode": "normal"}
+        bench(f"handle_request[path,{seconds}s]",
+              lambda h=header: request_roundtrip(daemon, model, h), heavy, setup=fresh_cache)
+        pcm = bytes(daemon.load_wav_pcm(str(path)))
+        inline = {"pcm_bytes": len(pcm), "mode": "normal"}
+        bench(f"handle_request[pcm,{seconds}s]",
+              lambda h=inline, p=pcm: request_roundtrip(daemon, model, h, bytearray(p)), heavy, setup=fresh_cache)
+        bench(f"handle_request[cached,{seconds}s]",
+              lambda h=header: request_roundtrip(daemon, model, h), heavy)
+
+    daemon._stats_writer.stop()
+    shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "-C", str(ROOT), "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+
+def compare(current: dict, baseline_path: str):
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+    print(f"\nCompared with {baseline_path} (p50, <1.00x is faster):")
+    for name, result in current.items():
+        old = baseline.get(name, {})
+        if "p50_ms" in result and old.get("p50_ms"):
+            ratio = result["p50_ms"] / old["p50_ms"]
+            flag = "  <-- slower" if ratio > 1.10 else ""
+            print(f"  {name:<42} {old['p50_ms']:>10.3f} -> {result['p50_ms']:>10.3f} ms  {ratio:5.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations")
+    parser.add_argument("--only", help="Run benchmarks whose name contains this string")
+    parser.add_argument("--decode-ms-per-second", type=float, default=0.0,
+                        help="Simulated fake-model cost per second of audio")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    commit = git_commit()
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "quick": args.quick,
+        "decode_ms_per_second": args.decode_ms_per_second,
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Post-processing benchmark for whisper-daemon.
+
+Checks the single-pass engine (clean_transcript) against the golden corpus
+and the reference functions (process_punctuation + remove_fillers), then
+compares throughput of both paths.
+
+Usage: python3 benchmarks/bench_postprocess.py [--iterations N] [--fuzz N]
+"""
+
+import argparse
+import importlib.machinery
+import importlib.util
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DAEMON_PATH = ROOT / "scripts" / "whisper-daemon"
+GOLDEN_PATH = Path(__file__).resolve().parent / "postprocess_golden.json"
+
+# Vocabulary for randomized differential checks
+FUZZ_WORDS = (
+    "um umm uh er hmm you know i mean so like so, like, basically actually literally "
+    "hello world this is a test period comma colon semicolon question mark "
+    "exclamation point open paren close paren open bracket close bracket open quote "
+    "close quote quote new line new paragraph dash ellipsis apostrophe and sign at sign "
+    "percent sign dollar sign hash plus sign equals sign underscore slash backslash "
+    ", . ! ? ( ) \" ' _ 42"
+).split(" ")
+FUZZ_SEPARATORS = [" ", " ", "  ", "\n", "\t", ""]
+
+
+def load_daemon():
+    """Import the extensionless daemon script as a module."""
+    loader = importlib.machinery.SourceFileLoader("whisper_daemon", str(DAEMON_PATH))
+    spec = importlib.util.spec_from_loader("whisper_daemon", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def reference(daemon, text: str) -> str:
+    return daemon.remove_fillers(daemon.process_punctuation(text))
+
+
+def check_golden(daemon) -> int:
+    """Return number of golden cases where either path disagrees with expected."""
+    cases = json.loads(GOLDEN_PATH.read_text())
+    failures = 0
+    for case in cases:
+        for name, output in (("reference", reference(daemon, case["input"])),
+                             ("engine", daemon.clean_transcript(case["input"]))):
+            if output != case["expected"]:
+                failures += 1
+                print(f"FAIL [{name}] {case['input']!r}: {output!r} != {case['expected']!r}")
+    print(f"Golden corpus: {len(cases)} cases, {failures} failures")
+    return failures
+
+
+def check_fuzz(daemon, count: int, seed: int = 0) -> int:
+    """Compare both paths on random transcripts built from command/filler words."""
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(count):
+        text = "".join(rng.choice(FUZZ_WORDS) + rng.choice(FUZZ_SEPARATORS)
+                       for _ in range(rng.randint(0, 16)))
+        expected = reference(daemon, text)
+        output = daemon.clean_transcript(text)
+        if output != expected:
+            failures += 1
+            if failures <= 5:
+                print(f"MISMATCH {text!r}: {output!r} != {expected!r}")
+    print(f"Differential fuzz: {count} inputs, {failures} mismatches")
+    return failures
+
+
+def throughput(func, texts, iterations: int) -> float:
+    """Characters processed per second."""
+    chars = sum(len(t) for t in texts) * iterations
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            func(text)
+    return chars / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="Passes over the corpus")
+    parser.add_argument("--fuzz", type=int, default=20000, help="Random differential inputs")
+    args = parser.parse_args()
+
+    daemon = load_daemon()
+    failures = check_golden(daemon) + check_fuzz(daemon, args.fuzz)
+
+    texts = [case["input"] for case in json.loads(GOLDEN_PATH.read_text())]
+    # A dictation-length transcript exercises the per-call overhead less
+    texts.append(" ".join(texts))
+
+    ref = throughput(lambda t: reference(daemon, t), texts, args.iterations)
+    eng = throughput(daemon.clean_transcript, texts, args.iterations)
+    print(f"Reference: {ref / 1e6:.2f} Mchar/s")
+    print(f"Engine:    {eng / 1e6:.2f} Mchar/s ({eng / ref:.1f}x)")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,9 +15,9 @@ echo_error() { echo -e "${RED}[ERROR]${NC} $1"; }
 check_gpu() {
     echo_info "Checking GPU..."
     if ! command -v nvidia-smi &>/dev/null; then
-        echo_error "nvidia-smi not found - NVIDIA drivers not installed"
-        echo_error "Please install NVIDIA drivers and CUDA before continuing"
-        return 1
+        echo_warn "nvidia-smi not found - daemon will use the CPU backend (int8)"
+        echo_warn "Install NVIDIA drivers and CUDA for GPU-accelerated transcription"
+        return 0
     fi
 
     # Check for at least 3GB VRAM
@@ -142,6 +142,8 @@ install_services() {
     # Substitute $HOME in templates
     sed "s|\$HOME|$HOME|g" systemd/whisper-daemon.service.template > "$HOME/.config/systemd/user/whisper-daemon.service"
     sed "s|\$HOME|$HOME|g" systemd/whisper-hotkey.service.template > "$HOME/.config/systemd/user/whisper-hotkey.service"
+    sed "s|\$HOME|$HOME|g" systemd/whisper-capture.service.template > "$HOME/.config/systemd/user/whisper-capture.service"
+    sed "s|\$HOME|$HOME|g" systemd/whisper-state.service.template > "$HOME/.config/systemd/user/whisper-state.service"
     cp systemd/ydotoold.service "$HOME/.config/systemd/user/ydotoold.service"
 
     systemctl --user daemon-reload
@@ -150,12 +152,16 @@ install_services() {
     systemctl --user enable ydotoold.service
     systemctl --user enable whisper-daemon.service
     systemctl --user enable whisper-hotkey.service
+    systemctl --user enable whisper-capture.service
+    systemctl --user enable whisper-state.service
 
-    # Start services
+    # Start services (the state bus first, so the daemon subscribes right away)
     echo_info "Starting services..."
+    systemctl --user start whisper-state.service
     systemctl --user start ydotoold.service
     systemctl --user start whisper-daemon.service
     systemctl --user start whisper-hotkey.service
+    systemctl --user start whisper-capture.service
 
     echo_info "Services installed and started"
 }
@@ -189,6 +195,18 @@ validate_installation() {
         echo_warn "✗ whisper-hotkey not running - check: journalctl --user -u whisper-hotkey"
     fi
 
+    if systemctl --user is-active --quiet whisper-capture.service; then
+        echo_info "✓ whisper-capture is running"
+    else
+        echo_warn "✗ whisper-capture not running - recording falls back to pw-record"
+    fi
+
+    if systemctl --user is-active --quiet whisper-state.service; then
+        echo_info "✓ whisper-state is running"
+    else
+        echo_warn "✗ whisper-state not running - overlays fall back to watching the flag files"
+    fi
+
     if systemctl --user is-active --quiet ydotoold.service; then
         echo_info "✓ ydotoold is running"
     else
@@ -198,7 +216,7 @@ validate_installation() {
     # Check daemon status file
     sleep 3  # Give daemon time to initialize
     if [[ -f /tmp/whisper-daemon.status ]]; then
-        status=$(cat /tmp/whisper-daemon.status)
+        status=$(head -n 1 /tmp/whisper-daemon.status)
         case "$status" in
             ready) echo_info "✓ Daemon ready for transcription" ;;
             starting) echo_warn "⏳ Daemon still starting (model downloading)..." ;;
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 """
 Whisper Flow - Animated waveform overlay for voice dictation
-A pure visual indicator that stays resident for instant display.
-Reads the growing WAV file for live audio levels.
+A pure visual indicator that stays resident for instant display, shown and
+hidden by pushes from the state bus (whisper_state.py).
+Reads live levels from whisper-capture's shared-memory level feed. Without
+the capture service it computes them from the tail of the growing WAV file.
 """
 
 import gi
@@ -19,13 +21,28 @@ except:
 
 from gi.repository import Gtk, Adw, Gdk, GLib, Gio
 import cairo
+import mmap
 import struct
 import math
 import os
 import sys
 
+from whisper_state import StateSubscriber, read_key
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 AUDIO_FILE = "/tmp/whisper-dictate.wav"
 STATE_FILE = "/tmp/whisper-dictate.state"
+SEGMENT_FILE = "/tmp/whisper-dictate.segment"
+CAPTURE_SHM = "/dev/shm/whisper-capture.pcm"
+CAPTURE_SHM_HEADER = struct.Struct("<4sIIIQQ")   # magic, version, sample rate, flags, segment, bytes
+LEVELS_PATH = "/dev/shm/whisper-levels"          # Written by whisper-capture
+LEVELS_HEADER = struct.Struct("<4sIIIQ")         # magic, version, slots, level ms, sequence
+LEVELS_MAGIC = b"WLVL"
+LEVELS_STALE_POLLS = 10                          # Polls without a new level before falling back
 
 # Waveform config
 NUM_BARS = 12
@@ -43,6 +60,56 @@ PILL_HEIGHT = MAX_BAR_HEIGHT + PADDING_V * 2 + 4
 SMOOTHING_FACTOR = 0.3
 
 
+class LevelFeed:
+    """Read-only view of whisper-capture's level ring (see LEVELS_HEADER)."""
+
+    def __init__(self, path):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            self.map = mmap.mmap(fd, 0, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        magic, version, self.slots, _level_ms, _seq = LEVELS_HEADER.unpack_from(self.map, 0)
+        if magic != LEVELS_MAGIC or version != 1 or len(self.map) < LEVELS_HEADER.size + self.slots * 4:
+            self.map.close()
+            raise ValueError("not a level feed")
+        self.last_seq = None
+        self.stale_polls = 0
+
+    def latest(self, count):
+        """The newest count levels (oldest first), or None while the feed is stalled."""
+        seq = LEVELS_HEADER.unpack_from(self.map, 0)[4]
+        if seq == self.last_seq:
+            self.stale_polls += 1
+        else:
+            self.last_seq = seq
+            self.stale_polls = 0
+        if self.stale_polls >= LEVELS_STALE_POLLS or seq < count:
+            return None
+        # The writer is at most a few slots ahead of seq, far from these
+        return [struct.unpack_from("<f", self.map, LEVELS_HEADER.size + (i % self.slots) * 4)[0]
+                for i in range(seq - count, seq)]
+
+    def close(self):
+        self.map.close()
+
+
+def tail_levels(raw, count):
+    """RMS of count equal blocks of s16 PCM."""
+    num_samples = len(raw) // 2
+    seg_size = max(1, num_samples // count)
+    if np is not None and num_samples >= count:
+        x = np.frombuffer(raw, dtype="<i2", count=seg_size * count).astype(np.float32).reshape(count, seg_size)
+        return np.sqrt(np.einsum("ij,ij->i", x, x) / seg_size).tolist()
+
+    samples = struct.unpack(f'<{num_samples}h', raw[:num_samples * 2])
+    levels = []
+    for i in range(count):
+        segment = samples[i * seg_size:min((i + 1) * seg_size, num_samples)]
+        levels.append(math.sqrt(sum(s * s for s in segment) / len(segment)) if segment else 0.0)
+    return levels
+
+
 class WaveformOverlay(Adw.ApplicationWindow):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -63,6 +130,8 @@ class WaveformOverlay(Adw.ApplicationWindow):
         self.bar_heights = [MIN_BAR_HEIGHT] * NUM_BARS
         self.target_heights = [MIN_BAR_HEIGHT] * NUM_BARS
         self.idle_phase = 0.0
+        self.levels = None
+        self.level_retry = 0
 
         self.drawing_area = Gtk.DrawingArea()
         self.drawing_area.set_content_width(PILL_WIDTH)
@@ -174,35 +243,57 @@ class WaveformOverlay(Adw.ApplicationWindow):
             wave = math.sin(self.idle_phase + i * 0.45) * 0.5 + 0.5
             self.target_heights[i] = MIN_BAR_HEIGHT + wave * (MAX_BAR_HEIGHT * 0.35 - MIN_BAR_HEIGHT)
 
+    def _read_tail(self, bytes_needed):
+        """Most recent PCM of the current recording."""
+        if os.path.exists(SEGMENT_FILE):
+            with open(CAPTURE_SHM, 'rb') as f:
+                header = CAPTURE_SHM_HEADER.unpack(f.read(CAPTURE_SHM_HEADER.size))
+                written = header[5]
+                f.seek(CAPTURE_SHM_HEADER.size + max(0, written - bytes_needed))
+                return f.read(min(written, bytes_needed))
+
+        if not os.path.exists(AUDIO_FILE):
+            return b''
+        file_size = os.path.getsize(AUDIO_FILE)
+        if file_size < 48:
+            return b''
+        read_start = max(44, file_size - bytes_needed)
+        with open(AUDIO_FILE, 'rb') as f:
+            f.seek(read_start)
+            return f.read(bytes_needed)
+
+    def _poll_levels(self):
+        """Newest NUM_BARS levels from the shared-memory feed, or None without one."""
+        if self.levels is None:
+            # Retry about once a second (the capture service may start later)
+            self.level_retry -= 1
+            if self.level_retry > 0:
+                return None
+            self.level_retry = 20
+            try:
+                self.levels = LevelFeed(LEVELS_PATH)
+            except (OSError, ValueError):
+                return None
+
+        levels = self.levels.latest(NUM_BARS)
+        if levels is None and self.levels.stale_polls >= LEVELS_STALE_POLLS:
+            # Capture stopped or restarted with a new file: reopen later
+            self.levels.close()
+            self.levels = None
+        return levels
+
     def _read_audio(self):
         if not self.visible_state or self.mode != 'recording':
             return True
         try:
-            if not os.path.exists(AUDIO_FILE):
-                return True
-            file_size = os.path.getsize(AUDIO_FILE)
-            if file_size < 48:
-                return True
-
-            bytes_needed = 3200
-            read_start = max(44, file_size - bytes_needed)
-            with open(AUDIO_FILE, 'rb') as f:
-                f.seek(read_start)
-                raw = f.read(bytes_needed)
-            if len(raw) < 4:
-                return True
-
-            num_samples = len(raw) // 2
-            samples = struct.unpack(f'<{num_samples}h', raw[:num_samples * 2])
-            seg_size = max(1, num_samples // NUM_BARS)
-            for i in range(NUM_BARS):
-                start = i * seg_size
-                end = min(start + seg_size, num_samples)
-                if start >= num_samples:
-                    self.target_heights[i] = MIN_BAR_HEIGHT
-                    continue
-                segment = samples[start:end]
-                rms = math.sqrt(sum(s * s for s in segment) / len(segment))
+            levels = self._poll_levels()
+            if levels is None:
+                raw = self._read_tail(3200)
+                if len(raw) < 4:
+                    return True
+                levels = tail_levels(raw, NUM_BARS)
+
+            for i, rms in enumerate(levels):
                 normalized = min(1.0, rms / 3000) ** 0.5
                 self.target_heights[i] = MIN_BAR_HEIGHT + normalized * (MAX_BAR_HEIGHT - MIN_BAR_HEIGHT)
         except Exception:
@@ -219,31 +310,33 @@ class WhisperFlowApp(Adw.Application):
     def do_activate(self):
         if not self.window:
             self.window = WaveformOverlay(application=self)
-
-        # Check state immediately
-        if os.path.exists(STATE_FILE):
-            self.window.set_mode('recording')
-            self.window.show_overlay()
-        else:
+            # State changes are pushed by the state bus; while it is down the
+            # file monitor (inotify) on the state file stands in for it
+            self.bus = StateSubscriber(
+                on_change=lambda changes: GLib.idle_add(self._on_state_changes, changes))
+            self.bus.start()
+            self.monitor = Gio.File.new_for_path(STATE_FILE).monitor_file(Gio.FileMonitorFlags.NONE, None)
+            self.monitor.connect('changed', self._on_state_file_changed)
+
+        self._apply_state(read_key('state'))
+
+    def _on_state_changes(self, changes):
+        if 'state' in changes:
+            self._apply_state(changes['state'])
+        return False
+
+    def _on_state_file_changed(self, monitor, file, other_file, event):
+        # Writes end with CHANGES_DONE_HINT, so skip the partial CHANGED events
+        if not self.bus.connected and event != Gio.FileMonitorEvent.CHANGED:
+            self._apply_state(read_key('state'))
+
+    def _apply_state(self, state):
+        if state == 'idle':
             self.window.hide_overlay()
-
-        GLib.timeout_add(150, self._check_state)
-
-    def _check_state(self):
-        if os.path.exists(STATE_FILE):
-            try:
-                with open(STATE_FILE) as f:
-                    state = f.read().strip()
-                if state == 'transcribing':
-                    self.window.set_mode('transcribing')
-                elif state == 'recording':
-                    self.window.set_mode('recording')
-                self.window.show_overlay()
-            except Exception:
-                pass
-        else:
-            self.window.hide_overlay()
-        return True
+            return
+        if state in ('recording', 'transcribing'):
+            self.window.set_mode(state)
+        self.window.show_overlay()
 
 
 def main():
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Client for the whisper-daemon socket protocol.
+
+One persistent connection carries any number of requests. After the
+preamble b"WSP" + version byte, every message in either direction is an
+8-byte header (JSON length, payload length; big-endian u32), a UTF-8 JSON
+object and an optional binary payload (s16le 16kHz mono PCM). Requests may
+be pipelined: each carries an "id" that its response echoes.
+
+Responses are {"id", "ok": true, "text", "segments", "timings", "levels", ...}
+or {"id", "ok": false, "error"}. A final's "levels" are the input levels
+measured by the daemon (peak_db, rms_db, speech_rms_db, clipped_runs).
+
+Library:
+    with DaemonClient() as client:
+        text = client.transcribe(path="/tmp/whisper-dictate.wav")["text"]
+
+Command line (prints the text, or JSON for status commands):
+    whisper_client.py transcribe --path FILE [--mode M] [--session ID] [--levels-file OUT]
+    whisper_client.py transcribe --shm PATH --segment N
+    whisper_client.py transcribe --dictation ID [--model M]   (archived audio)
+    whisper_client.py stream --session ID --path FILE
+    whisper_client.py endpoint --session ID
+    whisper_client.py metrics|models|ping
+"""
+import argparse
+import itertools
+import json
+import socket
+import struct
+import sys
+
+SOCKET_PATH = "/tmp/whisper-daemon.sock"
+PROTOCOL_MAGIC = b"WSP"
+PROTOCOL_VERSION = 1
+FRAME_HEADER = struct.Struct("!II")   # JSON length, payload length
+
+
+class DaemonError(Exception):
+    """The daemon answered a request with an error."""
+
+
+class DaemonClient:
+    """Persistent, pipelining connection to whisper-daemon."""
+
+    def __init__(self, path: str = SOCKET_PATH, timeout: float = 30):
+        self.path = path
+        self.timeout = timeout
+        self.sock = None
+        self._ids = itertools.count(1)
+        self._buf = bytearray()
+        self._responses = {}   # id -> response that arrived ahead of its turn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connect(self):
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+                sock.sendall(PROTOCOL_MAGIC + bytes([PROTOCOL_VERSION]))
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+            self._buf.clear()
+            self._responses.clear()
+        return self.sock
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def send(self, msg: dict, payload: bytes = b"") -> int:
+        """Queue a request without waiting. Returns its id for receive()."""
+        request_id = next(self._ids)
+        body = json.dumps({**msg, "id": request_id}).encode()
+        sock = self.connect()
+        try:
+            sock.sendall(FRAME_HEADER.pack(len(body), len(payload)) + body)
+            if payload:
+                sock.sendall(payload)
+        except OSError:
+            self.close()
+            raise
+        return request_id
+
+    def _read_exact(self, n: int) -> bytes:
+        while len(self._buf) < n:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("daemon closed the connection")
+            self._buf += chunk
+        data = bytes(self._buf[:n])
+        del self._buf[:n]
+        return data
+
+    def receive(self, request_id: int) -> dict:
+        """Wait for the response to one request; others are kept for later."""
+        if self.sock is None:
+            raise ConnectionError("not connected")
+        try:
+            while request_id not in self._responses:
+                json_len, payload_len = FRAME_HEADER.unpack(self._read_exact(FRAME_HEADER.size))
+                response = json.loads(self._read_exact(json_len))
+                if payload_len:
+                    self._read_exact(payload_len)
+                if response.get("id") is None and not response.get("ok", True):
+                    raise DaemonError(response.get("error", "protocol error"))
+                self._responses[response.get("id")] = response
+        except (OSError, ValueError):
+            self.close()
+            raise
+        return self._responses.pop(request_id)
+
+    def request(self, msg: dict, payload: bytes = b"") -> dict:
+        """Send one request and wait for its response. Raises DaemonError on failure.
+
+        A connection the daemon dropped (e.g. after a restart) is reopened once.
+        """
+        reused = self.sock is not None
+        try:
+            response = self.receive(self.send(msg, payload))
+        except ConnectionError:
+            if not reused:
+                raise
+            response = self.receive(self.send(msg, payload))
+        if not response.get("ok"):
+            raise DaemonError(response.get("error", "unknown error"))
+        return response
+
+    def transcribe(self, pcm: bytes = b"", **fields) -> dict:
+        """Final transcription of a path, capture segment (shm/segment) or raw PCM."""
+        if pcm:
+            fields["pcm_bytes"] = len(pcm)
+        return self.request(fields, pcm)
+
+    def stream(self, session: str, **fields) -> dict:
+        return self.request({"cmd": "stream", "session": session, **fields})
+
+    def endpoint(self, session: str) -> dict:
+        return self.request({"cmd": "endpoint", "session": session})
+
+    def metrics(self, **fields) -> dict:
+        return self.request({"cmd": "metrics", **fields})
+
+    def models(self) -> dict:
+        return self.request({"cmd": "models"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="whisper-daemon client")
+    parser.add_argument("command", choices=["transcribe", "stream", "endpoint", "metrics", "models", "ping"])
+    parser.add_argument("--path")
+    parser.add_argument("--shm")
+    parser.add_argument("--segment", type=int)
+    parser.add_argument("--dictation", type=int, help="re-transcribe an archived dictation")
+    parser.add_argument("--session")
+    parser.add_argument("--mode")
+    parser.add_argument("--model")
+    parser.add_argument("--deadline-ms", type=float)
+    parser.add_argument("--format", help="metrics format (json or prometheus)")
+    parser.add_argument("--json", action="store_true", help="print the full response")
+    parser.add_argument("--levels-file", help="also write the response's input levels (JSON) here")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    args = parser.parse_args()
+
+    fields = {key: value for key, value in (
+        ("path", args.path), ("shm", args.shm), ("segment", args.segment), ("dictation", args.dictation),
+        ("session", args.session), ("mode", args.mode), ("model", args.model),
+        ("deadline_ms", args.deadline_ms), ("format", args.format),
+    ) if value is not None}
+    if args.command != "transcribe":
+        fields["cmd"] = args.command
+
+    try:
+        with DaemonClient(args.socket, args.timeout) as client:
+            response = client.request(fields)
+    except (OSError, ValueError, DaemonError) as e:
+        print(f"whisper_client: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.levels_file and response.get("levels"):
+        with open(args.levels_file, "w") as f:
+            json.dump(response["levels"], f)
+
+    if "text" in response and not args.json:
+        sys.stdout.write(response["text"])
+    else:
+        print(json.dumps(response))
+
+
+if __name__ == "__main__":
+    main()
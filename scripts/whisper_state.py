@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""State bus for whisper-dictation: pushes flag-file changes to subscribers.
+
+The flag files in /tmp stay the source of truth (the shell scripts keep
+writing them), so nothing breaks when the bus is not running. The service
+watches /tmp with inotify and pushes every change to subscribers over
+/tmp/whisper-state.sock, replacing the per-tick polling in the overlay,
+whisper-stream and the daemon.
+
+Protocol: one JSON line per request.
+    {"cmd": "get"}                                -> {"state": "idle", "mode": "normal", ...}
+    {"cmd": "set", "key": "mode", "value": "whisper"}  (value null removes a file)
+    {"cmd": "subscribe"}                          -> snapshot line, then one line
+                                                     of changed keys per change
+
+Library:
+    bus = StateSubscriber(on_change=lambda changes: ...)
+    bus.start()
+    bus.get("noise_reduction")   # falls back to the flag file while disconnected
+
+Command line:
+    whisper_state.py serve
+    whisper_state.py get [KEY]
+    whisper_state.py set KEY [VALUE]     (flags: on|off; text keys: no value removes)
+    whisper_state.py watch
+"""
+import ctypes
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+
+SOCKET_PATH = "/tmp/whisper-state.sock"
+WATCH_DIR = "/tmp"
+
+# key -> (flag file, kind, default). "text" keys carry the file content,
+# "flag" keys are true while the file exists.
+STATE_KEYS = {
+    "state": ("/tmp/whisper-dictate.state", "text", "idle"),           # recording | transcribing | idle
+    "mode": ("/tmp/whisper-dictate.mode", "text", "normal"),           # normal | whisper
+    "flow": ("/tmp/whisper-flow.enabled", "flag", False),
+    "flow_mode": ("/tmp/whisper-flow.mode", "text", "regex"),
+    "noise_reduction": ("/tmp/whisper-noise-reduction.enabled", "flag", False),
+    "autostop": ("/tmp/whisper-autostop.enabled", "text", None),       # silence ms ("" = default)
+}
+KEY_BY_NAME = {os.path.basename(path): key for key, (path, _, _) in STATE_KEYS.items()}
+
+RECONNECT_DELAY = 2        # Seconds between subscriber reconnect attempts
+SEND_TIMEOUT = 1           # Client-side timeout for get/set requests
+MAX_REQUEST_BYTES = 4096   # Longest request line the server accepts
+MAX_PENDING_BYTES = 65536  # Subscribers this far behind on pushes are dropped
+
+# inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+INOTIFY_EVENT = struct.Struct("iIII")   # wd, mask, cookie, name length
+
+
+def read_key(key: str):
+    """Current value of a key, straight from its flag file."""
+    path, kind, default = STATE_KEYS[key]
+    if kind == "flag":
+        return os.path.exists(path)
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return default
+    # An existing but empty file still means "set" for autostop
+    return value if value or default is None else default
+
+
+def write_key(key: str, value):
+    """Set a key by writing its flag file (None/False removes it)."""
+    path, kind, _ = STATE_KEYS[key]
+    if value is None or value is False:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        return
+    # Write then rename so watchers never see an empty file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write("" if kind == "flag" or value is True else str(value))
+    os.replace(tmp, path)
+
+
+def snapshot() -> dict:
+    return {key: read_key(key) for key in STATE_KEYS}
+
+
+def inotify_watch(path: str, mask: int) -> int:
+    """Open an inotify descriptor watching one directory."""
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    if libc.inotify_add_watch(fd, os.fsencode(path), mask) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, f"inotify_add_watch {path} failed")
+    return fd
+
+
+def inotify_names(fd: int):
+    """File names from all pending inotify events."""
+    try:
+        data = os.read(fd, 65536)
+    except BlockingIOError:
+        return
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        offset += INOTIFY_EVENT.size
+        yield data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+        offset += length
+
+
+class Connection:
+    """Buffered state of one non-blocking client connection."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.subscribed = False
+        self.closing = False      # Close once outbuf is flushed (get/set replies)
+
+
+class StateServer:
+    """Single-threaded bus: inotify on /tmp in, JSON lines out.
+
+    Every socket is non-blocking and goes through the selector: requests are
+    read as they arrive and output is buffered per client, so a slow or idle
+    client never delays a push to the others.
+    """
+
+    def __init__(self, path: str = SOCKET_PATH):
+        self.path = path
+        self.state = snapshot()
+        self.subscribers = set()
+        self.selector = selectors.DefaultSelector()
+
+    def serve(self):
+        inotify = inotify_watch(WATCH_DIR, IN_CLOSE_WRITE | IN_DELETE | IN_MOVED_TO | IN_MOVED_FROM)
+        # Anything written before the watch existed
+        self.state = snapshot()
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        server.listen(16)
+        server.setblocking(False)
+
+        self.selector.register(inotify, selectors.EVENT_READ, "inotify")
+        self.selector.register(server, selectors.EVENT_READ, "accept")
+        print(f"whisper-state: listening on {self.path}", flush=True)
+        try:
+            while True:
+                for key, events in self.selector.select():
+                    if key.data == "inotify":
+                        self.files_changed(inotify_names(inotify))
+                    elif key.data == "accept":
+                        self.accept(server)
+                    else:
+                        if events & selectors.EVENT_WRITE:
+                            self.flush(key.data)
+                        if events & selectors.EVENT_READ:
+                            self.read(key.data)
+        finally:
+            for key in list(self.selector.get_map().values()):
+                if isinstance(key.data, Connection):
+                    self.drop(key.data)
+            server.close()
+            os.close(inotify)
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def files_changed(self, names):
+        keys = {KEY_BY_NAME[name] for name in names if name in KEY_BY_NAME}
+        changes = {}
+        for key in keys:
+            value = read_key(key)
+            if value != self.state[key]:
+                self.state[key] = value
+                changes[key] = value
+        if changes:
+            self.publish(changes)
+
+    def publish(self, changes: dict):
+        line = (json.dumps(changes) + "\n").encode()
+        for conn in list(self.subscribers):
+            self.send(conn, line)
+
+    def accept(self, server):
+        try:
+            sock, _ = server.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        self.selector.register(sock, selectors.EVENT_READ, Connection(sock))
+
+    def read(self, conn):
+        try:
+            data = conn.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data or conn.subscribed:
+            # Subscribers never send after subscribing; EOF or junk drops them
+            self.drop(conn)
+            return
+        conn.inbuf += data
+        if b"\n" in conn.inbuf:
+            self.handle(conn, bytes(conn.inbuf.split(b"\n", 1)[0]))
+        elif len(conn.inbuf) > MAX_REQUEST_BYTES:
+            self.drop(conn)
+
+    def handle(self, conn, line: bytes):
+        try:
+            request = json.loads(line or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+            cmd = request.get("cmd", "get")
+            if cmd == "subscribe":
+                conn.subscribed = True
+                self.subscribers.add(conn)
+                self.send(conn, (json.dumps(self.state) + "\n").encode())
+                return
+            if cmd == "set":
+                if request.get("key") not in STATE_KEYS:
+                    raise ValueError(f"unknown key: {request.get('key')}")
+                # The inotify event publishes the change
+                write_key(request["key"], request.get("value"))
+                reply = {"ok": True}
+            elif cmd == "get":
+                reply = self.state
+            else:
+                raise ValueError(f"unknown command: {cmd}")
+        except (OSError, ValueError) as e:
+            reply = {"ok": False, "error": str(e)}
+        conn.closing = True
+        self.send(conn, (json.dumps(reply) + "\n").encode())
+
+    def send(self, conn, data: bytes):
+        """Queue data for a client and write as much as it takes right now."""
+        conn.outbuf += data
+        if len(conn.outbuf) > MAX_PENDING_BYTES:
+            self.drop(conn)
+            return
+        self.flush(conn)
+
+    def flush(self, conn):
+        try:
+            sent = conn.sock.send(conn.outbuf)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self.drop(conn)
+            return
+        del conn.outbuf[:sent]
+        if not conn.outbuf and conn.closing:
+            self.drop(conn)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.outbuf else 0)
+        try:
+            self.selector.modify(conn.sock, events, conn)
+        except (KeyError, ValueError):
+            pass
+
+    def drop(self, conn):
+        self.subscribers.discard(conn)
+        try:
+            self.selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
+
+
+class StateSubscriber(threading.Thread):
+    """Background subscription to the bus.
+
+    on_change(changes) runs on this thread with a dict of changed keys; the
+    first call after (re)connecting carries the full snapshot. While the bus
+    is unreachable, get() reads the flag files directly.
+    """
+
+    def __init__(self, on_change=None, path: str = SOCKET_PATH):
+        super().__init__(daemon=True, name="state-subscriber")
+        self.path = path
+        self.on_change = on_change
+        self.state = {}
+        self.connected = False
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if self.connected:
+                return self.state[key]
+        return read_key(key)
+
+    def run(self):
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.path)
+                    sock.sendall(b'{"cmd": "subscribe"}\n')
+                    for line in sock.makefile("rb"):
+                        changes = json.loads(line)
+                        with self._lock:
+                            self.state.update(changes)
+                            self.connected = True
+                        if self.on_change:
+                            self.on_change(changes)
+            except (OSError, ValueError):
+                pass
+            with self._lock:
+                self.connected = False
+            time.sleep(RECONNECT_DELAY)
+
+
+def request(msg: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(SEND_TIMEOUT)
+        sock.connect(SOCKET_PATH)
+        sock.sendall((json.dumps(msg) + "\n").encode())
+        return json.loads(sock.makefile("rb").readline())
+
+
+def main():
+    args = sys.argv[1:]
+    cmd = args[0] if args else "get"
+    if cmd == "serve":
+        # SystemExit unwinds through serve() so the socket gets removed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            StateServer().serve()
+        except KeyboardInterrupt:
+            pass
+    elif cmd == "get":
+        try:
+            state = request({"cmd": "get"})
+        except OSError:
+            state = snapshot()
+        print(json.dumps(state[args[1]] if len(args) > 1 else state))
+    elif cmd == "set" and len(args) >= 2 and args[1] in STATE_KEYS:
+        value = args[2] if len(args) > 2 else None
+        if STATE_KEYS[args[1]][1] == "flag":
+            value = value not in ("0", "off", "false")
+        write_key(args[1], value)
+    elif cmd == "watch":
+        bus = StateSubscriber(on_change=lambda changes: print(json.dumps(changes), flush=True))
+        bus.start()
+        try:
+            bus.join()
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(__doc__.split("Command line:")[1].rstrip(), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,17 +21,23 @@ echo ""
 echo_info "Stopping services..."
 systemctl --user stop whisper-daemon.service 2>/dev/null || true
 systemctl --user stop whisper-hotkey.service 2>/dev/null || true
+systemctl --user stop whisper-capture.service 2>/dev/null || true
+systemctl --user stop whisper-state.service 2>/dev/null || true
 systemctl --user stop ydotoold.service 2>/dev/null || true
 
 echo_info "Disabling services..."
 systemctl --user disable whisper-daemon.service 2>/dev/null || true
 systemctl --user disable whisper-hotkey.service 2>/dev/null || true
+systemctl --user disable whisper-capture.service 2>/dev/null || true
+systemctl --user disable whisper-state.service 2>/dev/null || true
 systemctl --user disable ydotoold.service 2>/dev/null || true
 
 # Remove service files
 echo_info "Removing service files..."
 rm -f ~/.config/systemd/user/whisper-daemon.service
 rm -f ~/.config/systemd/user/whisper-hotkey.service
+rm -f ~/.config/systemd/user/whisper-capture.service
+rm -f ~/.config/systemd/user/whisper-state.service
 rm -f ~/.config/systemd/user/ydotoold.service
 
 systemctl --user daemon-reload
@@ -41,6 +47,9 @@ echo_info "Removing scripts..."
 rm -f ~/.local/bin/whisper-daemon
 rm -f ~/.local/bin/whisper-dictate
 rm -f ~/.local/bin/whisper-hotkey
+rm -f ~/.local/bin/whisper-capture
+rm -f ~/.local/bin/whisper_client.py
+rm -f ~/.local/bin/whisper_state.py
 rm -f ~/.local/bin/whisper-autogain
 rm -f ~/.local/bin/whisper-mode
 rm -f ~/.local/bin/whisper-stream
@@ -59,6 +68,8 @@ echo_info "Removing temporary files..."
 rm -f /tmp/whisper-daemon.sock
 rm -f /tmp/whisper-daemon.status
 rm -f /tmp/whisper-daemon.pid
+rm -f /tmp/whisper-capture.sock
+rm -f /tmp/whisper-state.sock
 rm -f /tmp/whisper-autogain-restore
 rm -f /tmp/whisper-noise-reduction.enabled
 
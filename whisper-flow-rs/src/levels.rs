@@ -0,0 +1,105 @@
+//! Reader for whisper-capture's shared-memory level feed.
+//!
+//! Layout (little-endian): magic "WLVL", u32 version, u32 slots, u32 level ms,
+//! u64 sequence, then `slots` f32 RMS levels (s16 scale) used as a ring. The
+//! writer stores a level and then bumps the sequence (levels written so far).
+
+use std::fs::File;
+use std::os::fd::AsRawFd;
+use std::ptr;
+
+pub const LEVELS_PATH: &str = "/dev/shm/whisper-levels";
+const MAGIC: &[u8; 4] = b"WLVL";
+const VERSION: u32 = 1;
+const HEADER_SIZE: usize = 24;
+const SEQUENCE_OFFSET: usize = 16;
+/// Polls without a new level before the feed counts as stalled
+pub const STALE_POLLS: u32 = 10;
+
+pub struct LevelFeed {
+    ptr: *const u8,
+    len: usize,
+    slots: u64,
+    last_seq: Option<u64>,
+    pub stale_polls: u32,
+}
+
+impl LevelFeed {
+    pub fn open() -> Option<Self> {
+        let file = File::open(LEVELS_PATH).ok()?;
+        let len = file.metadata().ok()?.len() as usize;
+        if len < HEADER_SIZE {
+            return None;
+        }
+        // SAFETY: read-only shared mapping of a regular file; the fd may be
+        // closed afterwards, the mapping stays valid until munmap in Drop
+        let ptr = unsafe {
+            libc::mmap(
+                ptr::null_mut(),
+                len,
+                libc::PROT_READ,
+                libc::MAP_SHARED,
+                file.as_raw_fd(),
+                0,
+            )
+        };
+        if ptr == libc::MAP_FAILED {
+            return None;
+        }
+        let mut feed = Self {
+            ptr: ptr as *const u8,
+            len,
+            slots: 0,
+            last_seq: None,
+            stale_polls: 0,
+        };
+        let header = feed.bytes::<4>(0);
+        let version = u32::from_le_bytes(feed.bytes::<4>(4));
+        feed.slots = u32::from_le_bytes(feed.bytes::<4>(8)) as u64;
+        if &header != MAGIC
+            || version != VERSION
+            || feed.slots == 0
+            || len < HEADER_SIZE + feed.slots as usize * 4
+        {
+            return None;
+        }
+        Some(feed)
+    }
+
+    fn bytes<const N: usize>(&self, offset: usize) -> [u8; N] {
+        debug_assert!(offset + N <= self.len);
+        // SAFETY: in bounds of the mapping; volatile because another process writes it
+        unsafe { ptr::read_volatile(self.ptr.add(offset) as *const [u8; N]) }
+    }
+
+    /// Fill `out` with the newest levels (oldest first). Returns false while
+    /// the feed is stalled or has fewer levels than requested.
+    pub fn latest(&mut self, out: &mut [f64]) -> bool {
+        let seq = u64::from_le_bytes(self.bytes::<8>(SEQUENCE_OFFSET));
+        if self.last_seq == Some(seq) {
+            self.stale_polls += 1;
+        } else {
+            self.last_seq = Some(seq);
+            self.stale_polls = 0;
+        }
+        let count = out.len() as u64;
+        if self.stale_polls >= STALE_POLLS || seq < count {
+            return false;
+        }
+        // The writer is at most a few slots ahead of seq, far from these
+        for (slot, level) in (seq - count..seq).zip(out.iter_mut()) {
+            let offset = HEADER_SIZE + (slot % self.slots) as usize * 4;
+            *level = f32::from_le_bytes(self.bytes::<4>(offset)) as f64;
+        }
+        true
+    }
+}
+
+impl Drop for LevelFeed {
+    fn drop(&mut self) {
+        // SAFETY: ptr/len come from the successful mmap in open()
+        unsafe {
+            libc::munmap(self.ptr as *mut libc::c_void, self.len);
+        }
+    }
+}
@@ -1,3 +1,5 @@
+mod levels;
+
 use std::cell::RefCell;
 use std::f64::consts::PI;
 use std::fs;
@@ -7,6 +9,7 @@ use std::rc::Rc;
 
 use gtk4::cairo;
 use gtk4::gdk::Display;
+use gtk4::gio;
 use gtk4::gio::ApplicationFlags;
 use gtk4::glib;
 use gtk4::glib::timeout_add_local;
@@ -16,6 +19,8 @@ use gtk4_layer_shell::{Edge, KeyboardMode, Layer, LayerShell};
 use libadwaita as adw;
 use libadwaita::prelude::*;
 
+use levels::LevelFeed;
+
 const AUDIO_FILE: &str = "/tmp/whisper-dictate.wav";
 const STATE_FILE: &str = "/tmp/whisper-dictate.state";
 
@@ -44,6 +49,9 @@ struct OverlayState {
     target_heights: [f64; NUM_BARS],
     idle_phase: f64,
     audio_buf: Vec<u8>,
+    levels: Option<LevelFeed>,
+    level_retry: u32,
+    state_monitor: Option<gio::FileMonitor>,
 }
 
 impl OverlayState {
@@ -55,7 +63,40 @@ impl OverlayState {
             target_heights: [MIN_BAR_HEIGHT; NUM_BARS],
             idle_phase: 0.0,
             audio_buf: vec![0u8; 3200],
+            levels: None,
+            level_retry: 0,
+            state_monitor: None,
+        }
+    }
+
+    fn set_levels(&mut self, levels: &[f64; NUM_BARS]) {
+        for (target, rms) in self.target_heights.iter_mut().zip(levels) {
+            let normalized = (rms / 3000.0).min(1.0).sqrt();
+            *target = MIN_BAR_HEIGHT + normalized * (MAX_BAR_HEIGHT - MIN_BAR_HEIGHT);
+        }
+    }
+
+    /// Newest levels from whisper-capture's shared-memory feed, if it is live
+    fn poll_levels(&mut self) -> Option<[f64; NUM_BARS]> {
+        if self.levels.is_none() {
+            // Retry about once a second (the capture service may start later)
+            if self.level_retry > 0 {
+                self.level_retry -= 1;
+                return None;
+            }
+            self.level_retry = 20;
+            self.levels = LevelFeed::open();
+        }
+        let feed = self.levels.as_mut()?;
+        let mut out = [0.0; NUM_BARS];
+        if feed.latest(&mut out) {
+            return Some(out);
         }
+        if feed.stale_polls >= levels::STALE_POLLS {
+            // Capture stopped or restarted with a new file: reopen later
+            self.levels = None;
+        }
+        None
     }
 }
 
@@ -69,6 +110,33 @@ fn rounded_rect(cr: &cairo::Context, x: f64, y: f64, w: f64, h: f64, r: f64) {
     cr.close_path();
 }
 
+/// Show, hide or recolor the overlay to match the state file
+fn apply_state(state: &RefCell<OverlayState>, window: &adw::ApplicationWindow) {
+    let mut s = state.borrow_mut();
+
+    if Path::new(STATE_FILE).exists() {
+        if let Ok(content) = fs::read_to_string(STATE_FILE) {
+            let trimmed = content.trim();
+            if trimmed == "transcribing" {
+                s.mode = Mode::Transcribing;
+            } else if trimmed == "recording" {
+                s.mode = Mode::Recording;
+            }
+        }
+        if !s.visible {
+            s.visible = true;
+            s.bar_heights = [MIN_BAR_HEIGHT; NUM_BARS];
+            s.target_heights = [MIN_BAR_HEIGHT; NUM_BARS];
+            drop(s);
+            window.present();
+        }
+    } else if s.visible {
+        s.visible = false;
+        drop(s);
+        window.set_visible(false);
+    }
+}
+
 fn main() {
     let app = adw::Application::new(
         Some("com.local.whisperflow"),
@@ -202,7 +270,7 @@ fn main() {
             glib::ControlFlow::Continue
         });
 
-        // Audio read timer (50ms)
+        // Audio level timer (50ms): shared-memory feed, else the WAV tail
         let audio_state = state.clone();
         timeout_add_local(std::time::Duration::from_millis(50), move || {
             let mut s = audio_state.borrow_mut();
@@ -210,6 +278,11 @@ fn main() {
                 return glib::ControlFlow::Continue;
             }
 
+            if let Some(levels) = s.poll_levels() {
+                s.set_levels(&levels);
+                return glib::ControlFlow::Continue;
+            }
+
             let path = Path::new(AUDIO_FILE);
             if !path.exists() {
                 return glib::ControlFlow::Continue;
@@ -270,36 +343,33 @@ fn main() {
             glib::ControlFlow::Continue
         });
 
-        // State file check timer (150ms)
+        // State changes: a file monitor (inotify) on the state file pushes
+        // them as they happen; poll only if the monitor cannot be created
         let state_check = state.clone();
         let win_ref = window.clone();
-        timeout_add_local(std::time::Duration::from_millis(150), move || {
-            let mut s = state_check.borrow_mut();
-
-            if Path::new(STATE_FILE).exists() {
-                if let Ok(content) = fs::read_to_string(STATE_FILE) {
-                    let trimmed = content.trim();
-                    if trimmed == "transcribing" {
-                        s.mode = Mode::Transcribing;
-                    } else if trimmed == "recording" {
-                        s.mode = Mode::Recording;
+        match gio::File::for_path(STATE_FILE)
+            .monitor_file(gio::FileMonitorFlags::NONE, gio::Cancellable::NONE)
+        {
+            Ok(monitor) => {
+                monitor.connect_changed(move |_, _, _, event| {
+                    // Writes end with ChangesDoneHint; skip the partial Changed events
+                    if event != gio::FileMonitorEvent::Changed {
+                        apply_state(&state_check, &win_ref);
                     }
-                }
-                if !s.visible {
-                    s.visible = true;
-                    s.bar_heights = [MIN_BAR_HEIGHT; NUM_BARS];
-                    s.target_heights = [MIN_BAR_HEIGHT; NUM_BARS];
-                    drop(s);
-                    win_ref.present();
-                }
-            } else if s.visible {
-                s.visible = false;
-                drop(s);
-                win_ref.set_visible(false);
+                });
+                state.borrow_mut().state_monitor = Some(monitor);
             }
-
-            glib::ControlFlow::Continue
-        });
+            Err(e) => {
+                eprintln!("whisper-flow: cannot monitor {STATE_FILE}: {e}; polling");
+                timeout_add_local(std::time::Duration::from_millis(150), move || {
+                    apply_state(&state_check, &win_ref);
+                    glib::ControlFlow::Continue
+                });
+            }
+        }
+        // The monitor only reports changes: pick up a recording that started
+        // (and wrote the state file) before the overlay was launched
+        apply_state(&state, &window);
     });
 
     app.run();